@@ -53,7 +53,8 @@ class BasicMatrixEngine(MatrixEngine):
     linear_solver: str or function, optional
         Setting of the numerical solver for linear problems Ax = b.
         It can be set with the name of a preexisting solver
-        (available: "direct" and "gmres", the former is the default choice)
+        (available: "direct", "lu_decomposition", "gmres" and "gmres_with_warm_start",
+        "lu_decomposition" is the default choice)
         or by passing directly a solver function.
     matrix_cache_size: int, optional
         number of matrices to keep in cache
@@ -64,13 +65,27 @@ class BasicMatrixEngine(MatrixEngine):
                                 'gmres': linear_solvers.solve_gmres,
                                 }
 
+    # Predefined solvers that can also solve a system with a matrix of several right-hand sides
+    available_multi_rhs_linear_solvers = {'lu_decomposition': available_linear_solvers['lu_decomposition'],
+                                          }
+
     def __init__(self, *, linear_solver='lu_decomposition', matrix_cache_size=1):
 
-        if linear_solver in self.available_linear_solvers:
+        if linear_solver == 'gmres_with_warm_start':
+            # A new instance for each engine, since the initial guess is the previous solution of this solver.
+            self.linear_solver = linear_solvers.GMRESSolverWithWarmStart().solve
+        elif linear_solver in self.available_linear_solvers:
             self.linear_solver = self.available_linear_solvers[linear_solver]
         else:
             self.linear_solver = linear_solver
 
+        if linear_solver == 'gmres_with_warm_start':
+            self.linear_solver_multi_rhs = self.linear_solver
+        elif linear_solver in self.available_multi_rhs_linear_solvers:
+            self.linear_solver_multi_rhs = self.available_multi_rhs_linear_solvers[linear_solver]
+        else:
+            self.linear_solver_multi_rhs = linear_solvers.solve_column_by_column(self.linear_solver)
+
         if matrix_cache_size > 0:
             self.build_matrices = lru_cache_with_strict_maxsize(maxsize=matrix_cache_size)(self.build_matrices)
 
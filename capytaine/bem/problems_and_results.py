@@ -264,6 +264,26 @@ class LinearPotentialFlowProblem:
         groups_of_problems = [[problems[i] for i in grp] for grp in groups_of_indices]
         return groups_of_problems
 
+    @staticmethod
+    def _group_for_batch_resolution(problems):
+        """Given a list of problems, returns a list of groups of indices of
+        these problems, such that the problems of each group share the same
+        influence matrices and only differ by their boundary condition.
+        Such a group can be solved at once as a linear system with several
+        right-hand sides.
+
+        Problems at zero or infinite frequency are not grouped with other problems.
+        """
+        groups_of_indices = {}
+        for i, pb in enumerate(problems):
+            if pb.body is None or float(pb.encounter_wavenumber) in {0.0, np.inf}:
+                key = i  # Not grouped with other problems
+            else:
+                key = (pb.body.mesh_including_lid, pb.free_surface, pb.water_depth,
+                       float(pb.encounter_wavenumber), pb.forward_speed)
+            groups_of_indices.setdefault(key, []).append(i)
+        return list(groups_of_indices.values())
+
     def __str__(self):
         """Do not display default values in str(problem)."""
         parameters = [f"body={self.body.__short_str__() if self.body is not None else None}",
@@ -358,6 +378,10 @@ class DiffractionProblem(LinearPotentialFlowProblem):
                          omega=omega, freq=freq, period=period, wavenumber=wavenumber, wavelength=wavelength, wave_direction=wave_direction,
                          forward_speed=forward_speed, rho=rho, g=g)
 
+        # Diffraction problems at zero or infinite frequency are not defined.
+        # The error is raised by the solver, see BEMSolver._solve_batch.
+        self._is_degenerate_diffraction = float(self.encounter_omega) in {0.0, np.inf}
+
         if self.body is not None:
 
             self.boundary_condition = -(
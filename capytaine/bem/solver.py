@@ -17,9 +17,9 @@ import pandas as pd
 
 from datetime import datetime
 
-from rich.progress import track
+from rich.progress import track, Progress
 
-from capytaine.bem.problems_and_results import LinearPotentialFlowProblem, DiffractionProblem
+from capytaine.bem.problems_and_results import LinearPotentialFlowProblem
 from capytaine.green_functions.delhommeau import Delhommeau
 from capytaine.bem.engines import BasicMatrixEngine
 from capytaine.io.xarray import problems_from_dataset, assemble_dataset, kochin_data_array
@@ -63,9 +63,10 @@ class BEMSolver:
             raise ValueError(f"Unrecognized method when initializing solver: {repr(method)}. Expected \"direct\" or \"indirect\".")
         self.method = method.lower()
 
-        self.timer = {"Solve total": Timer(), "  Green function": Timer(), "  Linear solver": Timer()}
+        # Wrapped once here rather than at each resolution
+        self._linear_solver = supporting_symbolic_multiplication(self.engine.linear_solver)
 
-        self.solve = self.timer["Solve total"].wraps_function(self.solve)
+        self.timer = {"Solve total": Timer(), "  Green function": Timer(), "  Linear solver": Timer()}
 
         try:
             self.exportable_settings = {
@@ -121,79 +122,151 @@ class BEMSolver:
         LinearPotentialFlowResult
             an object storing the problem data and its results
         """
-        LOG.info("Solve %s.", problem)
-
-        if _check_wavelength:
-            self._check_wavelength_and_mesh_resolution([problem])
-            self._check_wavelength_and_irregular_frequencies([problem])
-
-        if isinstance(problem, DiffractionProblem) and float(problem.encounter_omega) in {0.0, np.inf}:
-            raise ValueError("Diffraction problems at zero or infinite frequency are not defined")
-            # This error used to be raised when initializing the problem.
-            # It is now raised here, in order to be catchable by
-            # _solve_and_catch_errors, such that batch resolution
-            # can include this kind of problems without the full batch
-            # failing.
-            # Note that if this error was not raised here, the resolution
-            # would still fail with a less explicit error message.
-
-        if problem.forward_speed != 0.0:
-            omega, wavenumber = problem.encounter_omega, problem.encounter_wavenumber
-        else:
-            omega, wavenumber = problem.omega, problem.wavenumber
-
-        linear_solver = supporting_symbolic_multiplication(self.engine.linear_solver)
-        method = method if method is not None else self.method
-        if (method == 'direct'):
-            if problem.forward_speed != 0.0:
-                raise NotImplementedError("Direct solver is not able to solve problems with forward speed.")
-
-            with self.timer["  Green function"]:
-                S, D = self.engine.build_matrices(
-                        problem.body.mesh_including_lid, problem.body.mesh_including_lid,
-                        problem.free_surface, problem.water_depth, wavenumber,
-                        self.green_function, adjoint_double_layer=False
-                        )
-            rhs = S @ problem.boundary_condition
-            with self.timer["  Linear solver"]:
-                potential = linear_solver(D, rhs)
-            if not potential.shape == problem.boundary_condition.shape:
-                raise ValueError(f"Error in linear solver of {self.engine}: the shape of the output ({potential.shape}) "
-                                 f"does not match the expected shape ({problem.boundary_condition.shape})")
-            pressure = 1j * omega * problem.rho * potential
-            sources = None
-        else:
-            with self.timer["  Green function"]:
-                S, K = self.engine.build_matrices(
-                        problem.body.mesh_including_lid, problem.body.mesh_including_lid,
-                        problem.free_surface, problem.water_depth, wavenumber,
-                        self.green_function, adjoint_double_layer=True
-                        )
+        return self._solve_batch([problem], method=method, keep_details=keep_details, _check_wavelength=_check_wavelength)[0]
 
-            with self.timer["  Linear solver"]:
-                sources = linear_solver(K, problem.boundary_condition)
-            if not sources.shape == problem.boundary_condition.shape:
-                raise ValueError(f"Error in linear solver of {self.engine}: the shape of the output ({sources.shape}) "
-                                 f"does not match the expected shape ({problem.boundary_condition.shape})")
-            potential = S @ sources
-            pressure = 1j * omega * problem.rho * potential
-            if problem.forward_speed != 0.0:
-                result = problem.make_results_container(sources=sources)
-                # Temporary result object to compute the ∇Φ term
-                nabla_phi = self._compute_potential_gradient(problem.body.mesh_including_lid, result)
-                pressure += problem.rho * problem.forward_speed * nabla_phi[:, 0]
-
-        pressure_on_hull = pressure[:problem.body.mesh.nb_faces]  # Discards pressure on lid if any
-        forces = problem.body.integrate_pressure(pressure_on_hull)
-
-        if not keep_details:
-            result = problem.make_results_container(forces)
-        else:
-            result = problem.make_results_container(forces, sources, potential, pressure)
+    def _solve_batch(self, problems, method=None, keep_details=True, _check_wavelength=True):
+        """Solve together one or several problems sharing the same influence matrices,
+        such as the radiation problems of all the dofs of a body at a given frequency.
+        The matrices are built once. A single problem is solved with the linear solver of the engine,
+        while several problems are solved as a single linear system with several right-hand sides
+        with the `linear_solver_multi_rhs` of the engine.
 
-        LOG.debug("Done!")
+        Parameters
+        ----------
+        problems: list of LinearPotentialFlowProblem
+            a single problem or problems grouped by :meth:`~capytaine.bem.problems_and_results.LinearPotentialFlowProblem._group_for_batch_resolution`
+        method: string, optional
+            select boundary integral equation used to solve the problems.
+            If provided here, the value in argument overrides the global one.
+        keep_details: bool, optional
+            if True, store the sources and the potential on the floating body in the output objects
+            (default: True)
+        _check_wavelength: bool, optional (default: True)
+            If True, the frequencies are compared to the mesh resolution and
+            the estimated first irregular frequency to warn the user.
 
-        return result
+        Returns
+        -------
+        list of LinearPotentialFlowResult
+            the results in the same order as the problems
+        """
+        batch_timer = Timer()
+        try:
+            with batch_timer:
+                first_problem = problems[0]
+                if len(problems) == 1:
+                    LOG.info("Solve %s.", first_problem)
+                else:
+                    LOG.info("Solve %d problems sharing the same matrices as %s.", len(problems), first_problem)
+
+                if _check_wavelength:
+                    self._check_wavelength_and_mesh_resolution(problems)
+                    self._check_wavelength_and_irregular_frequencies(problems)
+
+                for problem in problems:
+                    if getattr(problem, "_is_degenerate_diffraction", False):
+                        raise ValueError("Diffraction problems at zero or infinite frequency are not defined")
+                        # This error used to be raised when initializing the problem.
+                        # It is now raised here, in order to be catchable by
+                        # _solve_and_catch_errors, such that batch resolution
+                        # can include this kind of problems without the full batch
+                        # failing.
+                        # Note that if this error was not raised here, the resolution
+                        # would still fail with a less explicit error message.
+
+                wavenumber = first_problem.encounter_wavenumber
+                mesh = first_problem.body.mesh_including_lid  # Shared by all the problems
+
+                if len(problems) == 1:
+                    # Might be a SymbolicMultiplication for zero or infinite frequency,
+                    # hence the linear solver wrapped to support them.
+                    boundary_conditions = first_problem.boundary_condition
+                    linear_solver = self._linear_solver
+                else:
+                    boundary_conditions = np.stack([pb.boundary_condition for pb in problems], axis=1).astype(np.complex128)
+                    linear_solver = self.engine.linear_solver_multi_rhs
+
+                method = method if method is not None else self.method
+                if (method == 'direct'):
+                    if first_problem.forward_speed != 0.0:
+                        raise NotImplementedError("Direct solver is not able to solve problems with forward speed.")
+
+                    with self.timer["  Green function"]:
+                        S, D = self.engine.build_matrices(
+                                mesh, mesh,
+                                first_problem.free_surface, first_problem.water_depth, wavenumber,
+                                self.green_function, adjoint_double_layer=False
+                                )
+                    rhs = S @ boundary_conditions
+                    with self.timer["  Linear solver"]:
+                        potentials = linear_solver(D, rhs)
+                    # The sanity checks of the output of the linear solver are skipped when running `python -O`.
+                    if __debug__ and potentials.shape != boundary_conditions.shape:
+                        raise ValueError(f"Error in linear solver of {self.engine}: the shape of the output ({potentials.shape}) "
+                                         f"does not match the expected shape ({boundary_conditions.shape})")
+                    sources = None
+                else:
+                    with self.timer["  Green function"]:
+                        S, K = self.engine.build_matrices(
+                                mesh, mesh,
+                                first_problem.free_surface, first_problem.water_depth, wavenumber,
+                                self.green_function, adjoint_double_layer=True
+                                )
+                    with self.timer["  Linear solver"]:
+                        sources = linear_solver(K, boundary_conditions)
+                    if __debug__ and sources.shape != boundary_conditions.shape:
+                        raise ValueError(f"Error in linear solver of {self.engine}: the shape of the output ({sources.shape}) "
+                                         f"does not match the expected shape ({boundary_conditions.shape})")
+                    potentials = S @ sources
+
+                pressure_coefficients = [1j * pb.encounter_omega * pb.rho for pb in problems]
+                if len(problems) == 1:
+                    all_sources, all_potentials = [sources], [potentials]
+                    all_pressures = [pressure_coefficients[0] * potentials]
+                else:
+                    # The pressures of all the problems are computed as a single block.
+                    # Each result then stores views of the columns of these blocks.
+                    all_sources = [None for _ in problems] if sources is None else sources.T
+                    all_potentials = potentials.T
+                    all_pressures = (potentials * np.array(pressure_coefficients)).T
+
+                results = []
+                for problem, sources_i, potential_i, pressure_i in zip(problems, all_sources, all_potentials, all_pressures):
+                    if problem.forward_speed != 0.0:
+                        result = problem.make_results_container(sources=sources_i)
+                        # Temporary result object to compute the ∇Φ term
+                        nabla_phi = self._compute_potential_gradient(mesh, result)
+                        pressure_i += problem.rho * problem.forward_speed * nabla_phi[:, 0]
+
+                    pressure_on_hull = pressure_i[:problem.body.mesh.nb_faces]  # Discards pressure on lid if any
+                    forces = problem.body.integrate_pressure(pressure_on_hull)
+
+                    if not keep_details:
+                        results.append(problem.make_results_container(forces))
+                    else:
+                        results.append(problem.make_results_container(forces, sources_i, potential_i, pressure_i))
+
+                LOG.debug("Done!")
+
+                return results
+        finally:
+            # "Solve total" keeps one timing per problem:
+            # the duration of a batch is shared evenly between its problems.
+            self.timer["Solve total"].add_shared_timing(batch_timer.total, len(problems))
+
+    def _solve_batch_and_catch_errors(self, problems, *args, **kwargs):
+        """Same as BEMSolver._solve_batch() but returns a
+        FailedLinearPotentialFlowResult for each problem when the resolution failed.
+        The problems are solved one by one if the engine cannot solve several right-hand sides at once."""
+        if len(problems) == 1 or getattr(self.engine, "linear_solver_multi_rhs", None) is None:
+            return [self._solve_and_catch_errors(pb, *args, **kwargs) for pb in problems]
+        try:
+            return self._solve_batch(problems, *args, **kwargs)
+        except Exception as e:
+            # The problems share the same matrices and linear system,
+            # solving them one by one would only fail again in the same way.
+            LOG.info(f"Skipped {len(problems)} problems sharing the same matrices as {problems[0]}\nbecause of {repr(e)}")
+            return [pb.make_failed_results_container(e) for pb in problems]
 
     def _solve_and_catch_errors(self, problem, *args, **kwargs):
         """Same as BEMSolver.solve() but returns a
@@ -252,9 +325,16 @@ class BEMSolver:
 
         if n_jobs == 1:  # force sequential resolution
             problems = sorted(problems)
-            if progress_bar:
-                problems = track(problems, total=len(problems), description="Solving BEM problems")
-            results = [self._solve_and_catch_errors(pb, method=method, _check_wavelength=False, **kwargs) for pb in problems]
+            groups_of_indices = LinearPotentialFlowProblem._group_for_batch_resolution(problems)
+            results = [None for _ in problems]
+            with Progress(disable=not progress_bar) as progress:
+                # The progress bar counts problems, even if they are solved by groups.
+                task = progress.add_task("Solving BEM problems", total=len(problems))
+                for grp in groups_of_indices:
+                    grp_results = self._solve_batch_and_catch_errors([problems[i] for i in grp], method=method, _check_wavelength=False, **kwargs)
+                    for i, res in zip(grp, grp_results):
+                        results[i] = res
+                    progress.update(task, advance=len(grp))
         else:
             joblib = silently_import_optional_dependency("joblib")
             if joblib is None:
@@ -275,8 +355,14 @@ class BEMSolver:
         """Display a warning if some of the problems have a mesh resolution
         that might not be sufficient for the given wavelength."""
         LOG.debug("Check wavelength with mesh resolution.")
-        risky_problems = [pb for pb in problems
-                          if 0.0 < pb.wavelength < pb.body.minimal_computable_wavelength]
+        minimal_wavelength_of_bodies = {}  # Computed once per body
+        for pb in problems:
+            if id(pb.body) not in minimal_wavelength_of_bodies:
+                minimal_wavelength_of_bodies[id(pb.body)] = pb.body.minimal_computable_wavelength
+        wavelengths = np.array([float(pb.wavelength) for pb in problems])
+        minimal_wavelengths = np.array([minimal_wavelength_of_bodies[id(pb.body)] for pb in problems])
+        is_risky = (0.0 < wavelengths) & (wavelengths < minimal_wavelengths)
+        risky_problems = [pb for pb, risky in zip(problems, is_risky) if risky]
         nb_risky_problems = len(risky_problems)
         if nb_risky_problems == 1:
             pb = risky_problems[0]
@@ -302,9 +388,16 @@ class BEMSolver:
     def _check_wavelength_and_irregular_frequencies(problems):
         """Display a warning if some of the problems might encounter irregular frequencies."""
         LOG.debug("Check wavelength with estimated irregular frequency.")
-        risky_problems = [pb for pb in problems
-                          if pb.free_surface != np.inf and
-                          pb.body.first_irregular_frequency_estimate(g=pb.g) < pb.omega < np.inf]
+        irregular_frequency_of_bodies = {}  # Computed once per body and value of g
+        for pb in problems:
+            if pb.free_surface != np.inf and (id(pb.body), pb.g) not in irregular_frequency_of_bodies:
+                irregular_frequency_of_bodies[(id(pb.body), pb.g)] = pb.body.first_irregular_frequency_estimate(g=pb.g)
+        omegas = np.array([float(pb.omega) for pb in problems])
+        # Problems without free surface are given an infinite irregular frequency and are never risky.
+        irregular_frequencies = np.array([irregular_frequency_of_bodies[(id(pb.body), pb.g)] if pb.free_surface != np.inf else np.inf
+                                          for pb in problems])
+        is_risky = (irregular_frequencies < omegas) & (omegas < np.inf)
+        risky_problems = [pb for pb, risky in zip(problems, is_risky) if risky]
         nb_risky_problems = len(risky_problems)
         if nb_risky_problems >= 1:
             if any(pb.body.lid_mesh is None for pb in problems):
@@ -375,7 +468,7 @@ class BEMSolver:
         return dataset
 
 
-    def compute_potential(self, points, result):
+    def compute_potential(self, points, result, chunk_size=1024):
         """Compute the value of the potential at given points for a previously solved potential flow problem.
 
         Parameters
@@ -384,6 +477,11 @@ class BEMSolver:
             Coordinates of the point(s) at which the potential should be computed
         result: LinearPotentialFlowResult
             The return of the BEM solver
+        chunk_size: int, optional
+            When a large number of points is given as an array, the interaction matrix
+            is built and multiplied with the sources by chunks of this number of points,
+            in order to limit the memory usage.
+            (default: 1024)
 
         Returns
         -------
@@ -400,12 +498,27 @@ class BEMSolver:
             They probably have not been stored by the solver because the option keep_details=True have not been set or the direct method has been used.
             Please re-run the resolution with the indirect method and keep_details=True.""")
 
-        with self.timer["  Green function"]:
-            S, _ = self.green_function.evaluate(points, result.body.mesh_including_lid, result.free_surface, result.water_depth, result.encounter_wavenumber)
-        potential = S @ result.sources  # Sum the contributions of all panels in the mesh
+        # At zero and infinite frequency, the sources are a SymbolicMultiplication,
+        # the potential is computed from its value and wrapped again afterwards.
+        @supporting_symbolic_multiplication
+        def potential_from_sources(points, sources):
+            if isinstance(points, np.ndarray) and points.shape[0] > chunk_size:
+                potential = np.empty((points.shape[0],), dtype=np.complex128)
+                for i in range(0, points.shape[0], chunk_size):
+                    potential[i:i+chunk_size] = potential_from_sources(points[i:i+chunk_size], sources)
+                return potential
+
+            with self.timer["  Green function"]:
+                S, _ = self.green_function.evaluate(points, result.body.mesh_including_lid, result.free_surface, result.water_depth, result.encounter_wavenumber)
+            return S @ sources  # Sum the contributions of all panels in the mesh
+
+        potential = potential_from_sources(points, result.sources)
         return potential.reshape(output_shape)
 
-    def _compute_potential_gradient(self, points, result):
+    def _compute_potential_and_gradient(self, points, result, chunk_size=1024, *, with_potential=True):
+        """Compute both the potential and its gradient at given points
+        from a single evaluation of the Green function.
+        If `with_potential` is False, only the gradient is computed and None is returned for the potential."""
         points, output_shape = _normalize_points(points, keep_mesh=True)
 
         if result.sources is None:
@@ -413,11 +526,29 @@ class BEMSolver:
             They probably have not been stored by the solver because the option keep_details=True have not been set.
             Please re-run the resolution with this option.""")
 
+        if isinstance(points, np.ndarray) and points.shape[0] > chunk_size:
+            potential = np.empty((points.shape[0],), dtype=np.complex128) if with_potential else None
+            velocities = np.empty((points.shape[0], 3), dtype=np.complex128)
+            for i in range(0, points.shape[0], chunk_size):
+                potential_chunk, velocities[i:i+chunk_size, :] = \
+                        self._compute_potential_and_gradient(points[i:i+chunk_size], result, chunk_size=chunk_size, with_potential=with_potential)
+                if with_potential:
+                    potential[i:i+chunk_size] = potential_chunk
+            return (potential.reshape(output_shape) if with_potential else None), velocities.reshape((*output_shape, 3))
+
         with self.timer["  Green function"]:
-            _, gradG = self.green_function.evaluate(points, result.body.mesh_including_lid, result.free_surface, result.water_depth, result.encounter_wavenumber,
+            S, gradG = self.green_function.evaluate(points, result.body.mesh_including_lid, result.free_surface, result.water_depth, result.encounter_wavenumber,
                                                 early_dot_product=False)
-        velocities = np.einsum('ijk,j->ik', gradG, result.sources)  # Sum the contributions of all panels in the mesh
-        return velocities.reshape((*output_shape, 3))
+        # Sum the contributions of all panels in the mesh.
+        potential = (S @ result.sources).reshape(output_shape) if with_potential else None
+        # gradG is stored in Fortran order, such that each of the three components is a contiguous matrix
+        # and can be multiplied by the sources with a single matrix-vector product.
+        velocities = np.stack([gradG[:, :, k] @ result.sources for k in range(3)], axis=-1)
+        return potential, velocities.reshape((*output_shape, 3))
+
+    def _compute_potential_gradient(self, points, result, chunk_size=1024):
+        _, velocities = self._compute_potential_and_gradient(points, result, chunk_size=chunk_size, with_potential=False)
+        return velocities
 
     def compute_velocity(self, points, result):
         """Compute the value of the velocity vector at given points for a previously solved potential flow problem.
@@ -463,8 +594,8 @@ class BEMSolver:
         Exception: if the :code:`LinearPotentialFlowResult` object given as input does not contain the source distribution.
         """
         if result.forward_speed != 0:
-            pressure = 1j * result.encounter_omega * result.rho * self.compute_potential(points, result)
-            nabla_phi = self._compute_potential_gradient(points, result)
+            potential, nabla_phi = self._compute_potential_and_gradient(points, result)
+            pressure = 1j * result.encounter_omega * result.rho * potential
             pressure += result.rho * result.forward_speed * nabla_phi[..., 0]
         else:
             pressure = 1j * result.omega * result.rho * self.compute_potential(points, result)
@@ -493,8 +624,8 @@ class BEMSolver:
         points, output_shape = _normalize_free_surface_points(points, keep_mesh=True)
 
         if result.forward_speed != 0:
-            fs_elevation = -1/result.g * (-1j*result.encounter_omega) * self.compute_potential(points, result)
-            nabla_phi = self._compute_potential_gradient(points, result)
+            potential, nabla_phi = self._compute_potential_and_gradient(points, result)
+            fs_elevation = -1/result.g * (-1j*result.encounter_omega) * potential
             fs_elevation += -1/result.g * result.forward_speed * nabla_phi[..., 0]
         else:
             fs_elevation = -1/result.g * (-1j*result.omega) * self.compute_potential(points, result)
@@ -537,26 +668,22 @@ class BEMSolver:
             They probably have not been stored by the solver because the option keep_details=True have not been set or the direct method has been used.
             Please re-run the resolution with the indirect method and keep_details=True.""")
 
-        if chunk_size > mesh.nb_faces:
-            S = self.engine.build_S_matrix(
-                mesh,
-                result.body.mesh_including_lid,
-                result.free_surface, result.water_depth, result.wavenumber,
-                self.green_function
-            )
-            phi = S @ result.sources
+        body_mesh = result.body.mesh_including_lid
 
-        else:
-            phi = np.empty((mesh.nb_faces,), dtype=np.complex128)
-            for i in range(0, mesh.nb_faces, chunk_size):
-                faces_to_extract = list(range(i, min(i+chunk_size, mesh.nb_faces)))
-                S = self.engine.build_S_matrix(
-                    mesh.extract_faces(faces_to_extract),
-                    result.body.mesh_including_lid,
+        # The Green function is evaluated directly at the centers of the faces,
+        # by chunks of faces (a single chunk if chunk_size > mesh.nb_faces),
+        # without going through the engine, whose cache would otherwise be filled
+        # with single-use matrices.
+        faces_centers = mesh.faces_centers
+        phi = np.empty((mesh.nb_faces,), dtype=np.complex128)
+        for i in range(0, mesh.nb_faces, chunk_size):
+            with self.timer["  Green function"]:
+                S, _ = self.green_function.evaluate(
+                    faces_centers[i:i+chunk_size],
+                    body_mesh,
                     result.free_surface, result.water_depth, result.wavenumber,
-                    self.green_function
                 )
-                phi[i:i+chunk_size] = S @ result.sources
+            phi[i:i+chunk_size] = S @ result.sources
 
         LOG.debug(f"Done computing potential on {mesh.name} for {result}.")
 
@@ -235,12 +235,13 @@ class FloatingBody(ClippableMixin, Abstract3DObject):
 
     def integrate_pressure(self, pressure):
         forces = {}
+        pressure_times_area = pressure * self.mesh.faces_areas  # Independent of the dof, computed once
         for dof_name in self.dofs:
             # Scalar product on each face:
             normal_dof_amplitude_on_face = - np.sum(self.dofs[dof_name] * self.mesh.faces_normals, axis=1)
             # The minus sign in the above line is because we want the force of the fluid on the body and not the force of the body on the fluid.
             # Sum over all faces:
-            forces[dof_name] = np.sum(pressure * normal_dof_amplitude_on_face * self.mesh.faces_areas)
+            forces[dof_name] = np.sum(pressure_times_area * normal_dof_amplitude_on_face)
         return forces
 
     @inplace_transformation
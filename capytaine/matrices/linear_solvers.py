@@ -62,6 +62,7 @@ class LUSolverWithCache:
     """Solve linear system with the LU decomposition.
 
     The latest LU decomposition is kept in memory, if a system with the same matrix needs to be solved again, then the decomposition is reused.
+    The right-hand side can also be a matrix whose columns are several right-hand sides, which are then solved with a single call to LAPACK.
 
     Most of the complexity of this class comes from:
     1. @lru_cache does not work because numpy arrays are not hashable. So a basic cache system has been recoded from scratch.
@@ -83,7 +84,10 @@ class LUSolverWithCache:
             A1, A2 = A._stored_blocks[0, :]
             return [self.lu_decomp(A1 + A2), self.lu_decomp(A1 - A2)]
         elif isinstance(A, np.ndarray):
-            return sl.lu_factor(A)
+            # No check for NaN or infinite values: the matrices built by the engine with the
+            # Delhommeau or HAMS Green functions have been checked for NaN, other inputs are not checked.
+            # The matrix is not overwritten since it may be kept in the cache of the engine.
+            return sl.lu_factor(A, check_finite=False)
         else:
             raise NotImplementedError("Cached LU solver is only implemented for dense matrices and 2×2 BlockSymmetricToeplitzMatrix.")
 
@@ -107,11 +111,28 @@ class LUSolverWithCache:
             x_minus = self.solve_with_decomp(decomp[1], b1 - b2)
             return np.concatenate([x_plus + x_minus, x_plus - x_minus])/2
         elif isinstance(decomp, tuple):  # The matrix was a np.ndarray
-            return sl.lu_solve(decomp, b)
+            lu = decomp[0]
+            if lu.dtype != b.dtype and np.can_cast(b.dtype, lu.dtype, casting="same_kind"):
+                # E.g. single precision matrix from a Green function with floating_point_precision="float32":
+                # the system is solved in single precision instead of upcasting the whole decomposition,
+                # and only the solution is returned in the precision of the right-hand side.
+                x = sl.lu_solve(decomp, b.astype(lu.dtype), check_finite=False)
+                return x.astype(np.result_type(lu, b))
+            return sl.lu_solve(decomp, b, check_finite=False)
         else:
             raise NotImplementedError("Cached LU solver is only implemented for dense matrices and 2×2 BlockSymmetricToeplitzMatrix.")
 
 
+# SEVERAL RIGHT-HAND SIDES
+
+def solve_column_by_column(linear_solver):
+    """Wrap a linear solver for a single right-hand side vector,
+    such that it can be used to solve AX = B for a matrix B whose columns are several right-hand sides."""
+    def solve_multi_rhs(A, B):
+        return np.stack([linear_solver(A, b) for b in B.T], axis=1)
+    return solve_multi_rhs
+
+
 # ITERATIVE SOLVER
 
 class Counter:
@@ -140,6 +161,106 @@ def solve_gmres(A, b):
 
     return x
 
+class GMRESSolverWithWarmStart:
+    """Solve linear system with a block-Jacobi preconditioned GMRES.
+
+    The solution of the latest resolution is kept in memory and used as initial guess for the next resolution.
+    When solving problems for a sweep of frequencies, the solution at the previous frequency is usually a good initial guess, and only a few iterations are needed.
+    The preconditioner, built from the LU decompositions of the diagonal blocks of the matrix, is cached as long as the same matrix is used.
+
+    Parameters
+    ----------
+    block_size: int, optional
+        Size of the diagonal blocks used for the block-Jacobi preconditioner (default: 100).
+    restart: int, optional
+        Number of iterations between restarts of the GMRES (default: 30).
+    """
+    def __init__(self, *, block_size=100, restart=30):
+        self.block_size = block_size
+        self.restart = restart
+        self.cached_matrix = None
+        self.cached_preconditioner = None
+        self.previous_solution = None
+
+    def solve(self, A, b):
+        if b.ndim == 2:  # Several right-hand sides, solved one after the other
+            if self.previous_solution is not None and self.previous_solution.shape == b.shape:
+                initial_guesses = self.previous_solution.T
+            else:
+                initial_guesses = [None for _ in range(b.shape[1])]
+            x = np.stack([self._solve_one_rhs(A, b_col, x0) for b_col, x0 in zip(b.T, initial_guesses)], axis=1)
+        else:
+            if self.previous_solution is not None and self.previous_solution.shape == b.shape:
+                x0 = self.previous_solution
+            else:
+                x0 = None
+            x = self._solve_one_rhs(A, b, x0)
+        self.previous_solution = x
+        return x
+
+    def block_jacobi_preconditioner(self, A):
+        """Return a LinearOperator applying the inverse of the block diagonal part of A.
+        The full matrix of a BlockMatrix is not built: its diagonal blocks are used directly."""
+        slices = []
+        diagonal_blocks_LU = []
+        LU_of_subblocks = {}  # The diagonal blocks of a Toeplitz matrix are the same object, factorized only once.
+        N = 0
+        for D in _dense_diagonal_blocks(A):
+            n = D.shape[0]
+            for i in range(0, n, self.block_size):
+                if (id(D), i) not in LU_of_subblocks:
+                    s = slice(i, min(i+self.block_size, n))
+                    LU_of_subblocks[(id(D), i)] = sl.lu_factor(D[s, s])
+                slices.append(slice(N+i, N+min(i+self.block_size, n)))
+                diagonal_blocks_LU.append(LU_of_subblocks[(id(D), i)])
+            N += n
+
+        def apply_preconditioner(v):
+            x = np.empty(N, dtype=np.complex128)
+            for s, block_LU in zip(slices, diagonal_blocks_LU):
+                x[s] = sl.lu_solve(block_LU, v[s], check_finite=False)
+            return x
+
+        return ssl.LinearOperator((N, N), matvec=apply_preconditioner, dtype=np.complex128)
+
+    def cached_block_jacobi_preconditioner(self, A):
+        if A is not self.cached_matrix:
+            self.cached_matrix = A
+            LOG.debug("Computing and caching block-Jacobi preconditioner")
+            self.cached_preconditioner = self.block_jacobi_preconditioner(A)
+        else:
+            LOG.debug("Using cached block-Jacobi preconditioner")
+        return self.cached_preconditioner
+
+    def _solve_one_rhs(self, A, b, x0):
+        LOG.debug(f"Solve with preconditioned GMRES for {A}.")
+        M = self.cached_block_jacobi_preconditioner(A)
+        A_op = ssl.LinearOperator(A.shape, matvec=lambda v: A @ v, dtype=np.complex128)
+
+        if LOG.isEnabledFor(logging.INFO):
+            counter = Counter()
+            x, info = ssl.gmres(A_op, b, x0=x0, M=M, atol=1e-6, restart=self.restart, callback=counter, callback_type="pr_norm")
+            LOG.info(f"End of GMRES after {counter.nb_iter} iterations.")
+        else:
+            x, info = ssl.gmres(A_op, b, x0=x0, M=M, atol=1e-6, restart=self.restart)
+
+        if info > 0:
+            raise RuntimeError(f"No convergence of the GMRES after {info} iterations.\n"
+                                "This can be due to overlapping panels or irregular frequencies.\n"
+                                "In the latter case, using a direct solver can help (https://github.com/mancellin/capytaine/issues/30).")
+
+        return x
+
+def _dense_diagonal_blocks(A):
+    """List of the dense square blocks along the diagonal of A, without building the full matrix of a BlockMatrix."""
+    if isinstance(A, BlockMatrix) and all(shape_1 == shape_2 for shape_1, shape_2 in zip(*A.block_shapes)):
+        all_blocks = A.all_blocks
+        return [D for i in range(A.nb_blocks[0]) for D in _dense_diagonal_blocks(all_blocks[i, i])]
+    elif isinstance(A, BlockMatrix):
+        return [A.full_matrix()]
+    else:
+        return [A]
+
 def gmres_no_fft(A, b):
     LOG.debug(f"Solve with GMRES for {A} without using FFT.")
 
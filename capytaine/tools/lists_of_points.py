@@ -5,6 +5,11 @@ from capytaine.meshes.mesh_like_protocol import MeshLike
 
 
 def _normalize_points(points, keep_mesh=False):
+    if isinstance(points, np.ndarray):
+        # Most common case, checked first since the isinstance check on the
+        # runtime-checkable protocol MeshLike below is comparatively slow.
+        return _normalize_array_of_points(points)
+
     if isinstance(points, (FloatingBody, FreeSurface)):
         if keep_mesh:
             return points.mesh, (points.mesh.nb_faces,)
@@ -17,8 +22,9 @@ def _normalize_points(points, keep_mesh=False):
         else:
             return points.faces_centers, (points.nb_faces,)
 
-    points = np.asarray(points)
+    return _normalize_array_of_points(np.asarray(points))
 
+def _normalize_array_of_points(points):
     if points.ndim == 1:  # A single point has been provided
         output_shape = (1,)
         points = points.reshape((1, points.shape[0]))
@@ -38,11 +44,12 @@ def _normalize_points(points, keep_mesh=False):
     return points, output_shape
 
 def _normalize_free_surface_points(points, keep_mesh=False):
-    if keep_mesh and isinstance(points, (FloatingBody, FreeSurface)):
-        return points.mesh, (points.mesh.nb_faces,)
+    if keep_mesh and not isinstance(points, np.ndarray):
+        if isinstance(points, (FloatingBody, FreeSurface)):
+            return points.mesh, (points.mesh.nb_faces,)
 
-    if keep_mesh and isinstance(points, MeshLike):
-        return points, (points.nb_faces,)
+        if isinstance(points, MeshLike):
+            return points, (points.nb_faces,)
 
     points, output_shape = _normalize_points(points, keep_mesh)
 
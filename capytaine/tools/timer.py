@@ -56,6 +56,10 @@ class Timer:
     def __exit__(self, *exc):
         self.timings.append(time.perf_counter() - self.start_time)
 
+    def add_shared_timing(self, duration, nb):
+        """Record `nb` timings, sharing evenly the given `duration` (e.g. several problems solved together)."""
+        self.timings.extend([duration/nb]*nb)
+
     def wraps_function(self, f):
         @wraps(f)
         def wrapped_f(*args, **kwargs):
@@ -1,7 +1,9 @@
 import pytest
+from unittest.mock import patch
 
 import numpy as np
 import capytaine as cpt
+from capytaine.matrices import linear_solvers
 
 
 def test_cache_matrices():
@@ -73,3 +75,46 @@ def test_custom_linear_solver_returning_wrong_shape(method):
     )
     with pytest.raises(ValueError):
         my_bem_solver.solve(problem)
+
+
+def test_gmres_with_warm_start_on_frequency_sweep():
+    sphere = cpt.FloatingBody(mesh=cpt.mesh_sphere(radius=1.0, resolution=(4, 3)).immersed_part())
+    sphere.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    problems = [cpt.RadiationProblem(body=sphere, omega=omega) for omega in np.linspace(0.5, 2.0, 4)]
+    reference_solver = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(linear_solver="lu_decomposition"))
+    reference_results = reference_solver.solve_all(problems)
+    solver = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(linear_solver="gmres_with_warm_start"))
+    results = solver.solve_all(problems)
+    for res, ref in zip(results, reference_results):
+        assert res.forces["Heave"] == pytest.approx(ref.forces["Heave"], rel=1e-5)
+
+
+def test_gmres_with_warm_start_uses_previous_solution_of_the_same_engine():
+    sphere = cpt.FloatingBody(mesh=cpt.mesh_sphere(radius=1.0, resolution=(4, 3)).immersed_part())
+    sphere.add_translation_dof(direction=(0, 0, 1), name="Heave")
+    problems = [cpt.RadiationProblem(body=sphere, omega=omega) for omega in np.linspace(0.5, 2.0, 4)]
+    solver = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(linear_solver="gmres_with_warm_start"))
+    with patch.object(linear_solvers.ssl, "gmres", wraps=linear_solvers.ssl.gmres) as gmres:
+        solver.solve_all(problems)
+    assert gmres.call_count == len(problems)
+    assert gmres.call_args_list[0].kwargs["x0"] is None
+    assert all(call.kwargs["x0"] is not None for call in gmres.call_args_list[1:])
+    assert all(call.kwargs["M"] is not None for call in gmres.call_args_list)
+
+    # Another engine does not start from the solutions of the first one
+    other_solver = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(linear_solver="gmres_with_warm_start"))
+    with patch.object(linear_solvers.ssl, "gmres", wraps=linear_solvers.ssl.gmres) as gmres:
+        other_solver.solve(problems[0])
+    assert gmres.call_args.kwargs["x0"] is None
+
+
+def test_matrices_are_reused_between_solves():
+    """Successive calls to `solve` at the same frequency should reuse the cached matrices."""
+    sphere = cpt.FloatingBody(mesh=cpt.mesh_sphere(radius=1.0, resolution=(4, 3)).immersed_part(),
+                              dofs=cpt.rigid_body_dofs())
+    gf = cpt.Delhommeau()
+    solver = cpt.BEMSolver(green_function=gf, engine=cpt.BasicMatrixEngine(matrix_cache_size=1))
+    with patch.object(gf, "evaluate", wraps=gf.evaluate) as evaluate:
+        for dof in sphere.dofs:
+            solver.solve(cpt.RadiationProblem(body=sphere, radiating_dof=dof, omega=1.0))
+    assert evaluate.call_count == 1
@@ -140,6 +140,15 @@ def test_compute_velocity_at_meshgrid(solver, result):
     u = solver.compute_velocity(points, result)
     assert u.shape == (*points[0].shape, 3)
 
+def test_compute_potential_and_velocity_at_meshgrid_by_chunks(solver, result):
+    points = np.meshgrid(np.linspace(2.0, 3.0, 2), np.linspace(4.0, 5.0, 3), np.linspace(-2.0, -1.0, 4))
+    phi = solver.compute_potential(points, result, chunk_size=5)
+    assert phi.shape == points[0].shape
+    assert np.allclose(phi, solver.compute_potential(points, result))
+    u = solver._compute_potential_gradient(points, result, chunk_size=5)
+    assert u.shape == (*points[0].shape, 3)
+    assert np.allclose(u, solver._compute_potential_gradient(points, result))
+
 def test_airy_waves_free_surface_elevation_at_meshgrid(result):
     from capytaine.bem.airy_waves import airy_waves_free_surface_elevation
     points = np.meshgrid(np.linspace(0.0, 1.0, 2), np.linspace(-1.0, 1.0, 3))
@@ -175,6 +184,20 @@ def test_compute_potential_on_mesh(solver, result):
     phi = solver.compute_potential(mesh, result)
     assert phi.shape == (mesh.nb_faces,)
 
+def test_legacy_potential_on_mesh_by_chunks(solver, result):
+    mesh = cpt.mesh_vertical_cylinder(radius=2.0, length=5.0).immersed_part()
+    phi = solver.compute_potential(mesh, result)
+    phi_by_chunks = solver.get_potential_on_mesh(result, mesh, chunk_size=7)
+    assert phi_by_chunks == approx(phi)
+
+def test_legacy_potential_on_mesh_in_a_single_chunk(solver, result):
+    mesh = cpt.mesh_vertical_cylinder(radius=2.0, length=5.0).immersed_part()
+    phi_by_chunks = solver.get_potential_on_mesh(result, mesh, chunk_size=7)
+    nb_timings = solver.timer["  Green function"].nb_timings
+    phi = solver.get_potential_on_mesh(result, mesh, chunk_size=mesh.nb_faces + 1)
+    assert phi == approx(phi_by_chunks)
+    assert solver.timer["  Green function"].nb_timings == nb_timings + 1
+
 def test_airy_waves_velocity_on_mesh(result):
     from capytaine.bem.airy_waves import airy_waves_velocity
     mesh = cpt.mesh_vertical_cylinder(radius=2.0, length=5.0).immersed_part()
@@ -1,10 +1,12 @@
 import pytest
+from unittest.mock import patch
 
 import numpy as np
 import xarray as xr
 
 import capytaine as cpt
 from capytaine import __version__
+from capytaine.bem.problems_and_results import LinearPotentialFlowProblem
 
 
 @pytest.fixture
@@ -146,3 +148,66 @@ def test_warning_mesh_resolution(sphere, caplog):
     with caplog.at_level("WARNING"):
         solver.solve(pb)
     assert "resolution " in caplog.text
+
+
+@pytest.mark.parametrize("method", ["direct", "indirect"])
+def test_solve_all_with_several_rhs(method):
+    mesh = cpt.mesh_sphere(radius=1.0, resolution=(4, 4)).immersed_part()
+    body = cpt.FloatingBody(mesh=mesh, dofs=cpt.rigid_body_dofs(), lid_mesh=mesh.generate_lid())
+    problems = [cpt.RadiationProblem(body=body, radiating_dof=dof, omega=omega)
+                for dof in body.dofs for omega in [1.0, 2.0]]
+    problems.append(cpt.DiffractionProblem(body=body, omega=1.0))
+    assert len(LinearPotentialFlowProblem._group_for_batch_resolution(problems)) == 2
+    solver = cpt.BEMSolver(method=method)
+    batch_results = solver.solve_all(problems)
+    for res in batch_results:
+        ref = solver.solve(res.problem)
+        assert np.allclose(res.potential, ref.potential)
+        assert res.forces == pytest.approx(ref.forces)
+
+
+def test_solve_all_with_several_rhs_and_custom_linear_solver(sphere):
+    def my_linear_solver(A, b):
+        assert b.ndim == 1
+        return np.linalg.solve(A, b)
+    solver = cpt.BEMSolver(engine=cpt.BasicMatrixEngine(linear_solver=my_linear_solver))
+    problems = [cpt.RadiationProblem(body=sphere, omega=1.0), cpt.DiffractionProblem(body=sphere, omega=1.0)]
+    results = solver.solve_all(problems)
+    assert not any(hasattr(res, "exception") for res in results)
+    assert results[0].forces == pytest.approx(solver.solve(results[0].problem).forces)
+
+
+def test_failed_batch_is_not_solved_again_one_by_one(sphere):
+    def failing_linear_solver(A, b):
+        raise RuntimeError("Failing linear solver")
+    gf = cpt.Delhommeau()
+    solver = cpt.BEMSolver(green_function=gf, engine=cpt.BasicMatrixEngine(linear_solver=failing_linear_solver, matrix_cache_size=0))
+    problems = [cpt.RadiationProblem(body=sphere, omega=1.0), cpt.DiffractionProblem(body=sphere, omega=1.0)]
+    with patch.object(gf, "evaluate", wraps=gf.evaluate) as evaluate:
+        results = solver.solve_all(problems, progress_bar=False)
+    assert all(isinstance(res.exception, RuntimeError) for res in results)
+    assert evaluate.call_count == 1
+
+
+def test_timer_counts_problems_solved_together(sphere):
+    solver = cpt.BEMSolver()
+    problems = [cpt.RadiationProblem(body=sphere, radiating_dof=dof, omega=1.0) for dof in sphere.dofs]
+    problems.append(cpt.DiffractionProblem(body=sphere, omega=1.0))
+    solver.solve_all(problems, progress_bar=False)
+    assert solver.timer["Solve total"].nb_timings == len(problems)
+    assert solver.timer["  Linear solver"].nb_timings == 1
+
+
+def test_fill_dataset_builds_each_matrix_once():
+    mesh = cpt.mesh_sphere(radius=1.0, resolution=(4, 4)).immersed_part()
+    body = cpt.FloatingBody(mesh=mesh, dofs=cpt.rigid_body_dofs())
+    gf = cpt.Delhommeau()
+    solver = cpt.BEMSolver(green_function=gf, engine=cpt.BasicMatrixEngine(matrix_cache_size=0))
+    test_matrix = xr.Dataset(coords={
+        'omega': [0.5, 1.0, 2.0],
+        'wave_direction': [0.0, np.pi/2],
+        'radiating_dof': list(body.dofs),
+    })
+    with patch.object(gf, "evaluate", wraps=gf.evaluate) as evaluate:
+        solver.fill_dataset(test_matrix, body)
+    assert evaluate.call_count == 3
@@ -153,6 +153,23 @@ def test_no_warning_mesh_resolution_at_zero_wavelength(caplog):
     assert "resolution " not in caplog.text
 
 
+@pytest.mark.parametrize("omega", [0.0, np.inf])
+def test_compute_potential_by_chunks_at_limit_freq(omega):
+    from capytaine.tools.symbolic_multiplication import SymbolicMultiplication
+    solver = cpt.BEMSolver()
+    res = solver.solve(cpt.RadiationProblem(body=make_simple_body(), omega=omega))
+    points = np.meshgrid(np.linspace(-5.0, 5.0, 10), np.linspace(-5.0, 5.0, 10), np.linspace(-3.0, -2.0, 2))
+    phi = solver.compute_potential(points, res, chunk_size=30)
+    phi_ref = solver.compute_potential(points, res, chunk_size=1000)
+    assert isinstance(phi, SymbolicMultiplication)
+    assert phi.shape == (10, 10, 2)
+    assert np.allclose(phi.value, phi_ref.value)
+
+    many_points = np.meshgrid(np.linspace(-5.0, 5.0, 50), np.linspace(-5.0, 5.0, 50))  # More than the default chunk_size
+    fse = solver.compute_free_surface_elevation(many_points, res)
+    assert fse.shape == (50, 50)
+
+
 ##############################################
 #  Fails with correct error for diffraction  #
 ##############################################
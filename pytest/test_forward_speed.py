@@ -68,6 +68,20 @@ def test_pressure_reconstruction(result, solver):
     pressure = solver.compute_pressure(result.body.mesh, result)
     assert result.body.integrate_pressure(pressure) == approx(result.forces)
 
+def test_potential_and_gradient_from_single_evaluation(result, solver):
+    points = np.meshgrid(np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, -1.0, 2))
+    potential, nabla_phi = solver._compute_potential_and_gradient(points, result)
+    assert np.allclose(potential, solver.compute_potential(points, result))
+    assert np.allclose(nabla_phi, solver._compute_potential_gradient(points, result))
+
+def test_gradient_without_potential(result, solver):
+    points = np.meshgrid(np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, -1.0, 2))
+    _, nabla_phi = solver._compute_potential_and_gradient(points, result)
+    for chunk_size in (1024, 5):
+        potential, nabla_phi_only = solver._compute_potential_and_gradient(points, result, chunk_size=chunk_size, with_potential=False)
+        assert potential is None
+        assert np.allclose(nabla_phi_only, nabla_phi)
+
 def test_velocity_reconstruction(result, solver):
     points = np.meshgrid(np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, 10.0, 3), np.linspace(-10.0, -1.0, 2))
     velocity = solver.compute_velocity(points, result)
@@ -1,11 +1,16 @@
+import logging
+from unittest.mock import patch
+
 import pytest
 import numpy as np
+import scipy.linalg as sl
 from numpy.random import default_rng
 import capytaine as cpt
 
+from capytaine.matrices.block import BlockMatrix
 from capytaine.matrices.block_toeplitz import BlockSymmetricToeplitzMatrix, BlockCirculantMatrix, BlockToeplitzMatrix
 from capytaine.matrices.builders import random_block_matrix
-from capytaine.matrices.linear_solvers import solve_directly, LUSolverWithCache, solve_gmres
+from capytaine.matrices.linear_solvers import solve_directly, LUSolverWithCache, solve_gmres, GMRESSolverWithWarmStart
 
 RNG = default_rng(seed=0)
 
@@ -32,11 +37,48 @@ def test_solve_with_lu_full_problem(solved_full_problem):
     x = linear_solver.solve(A, b)  # Should use cache
     assert np.allclose(x, x_ref, rtol=1e-10)
 
+def test_solve_with_lu_single_precision_matrix(solved_full_problem):
+    A, x_ref, b = solved_full_problem
+    linear_solver = LUSolverWithCache()
+    with patch.object(sl, "lu_solve", wraps=sl.lu_solve) as lu_solve:
+        x = linear_solver.solve(A.astype(np.complex64), b.astype(np.complex128))
+    # The right-hand side is cast to the precision of the decomposition...
+    assert lu_solve.call_count == 1
+    assert lu_solve.call_args[0][1].dtype == np.complex64
+    # ... and the solution is cast back.
+    assert x.dtype == np.complex128
+    assert np.allclose(x, x_ref, rtol=1e-4)
+
 def test_gmres_full_problem(solved_full_problem):
     A, x_ref, b = solved_full_problem
     x = solve_gmres(A, b)
     assert np.allclose(x, x_ref, rtol=1e-10)
 
+def test_gmres_with_warm_start_full_problem(solved_full_problem):
+    A, x_ref, b = solved_full_problem
+    linear_solver = GMRESSolverWithWarmStart(block_size=2)
+    x = linear_solver.solve(A, b)
+    assert np.allclose(x, x_ref, rtol=1e-10)
+    x = linear_solver.solve(A, b)  # Should use previous solution as initial guess
+    assert np.allclose(x, x_ref, rtol=1e-10)
+
+def test_gmres_warm_start_reduces_the_number_of_iterations(solved_full_problem, caplog):
+    A, x_ref, b = solved_full_problem
+    linear_solver = GMRESSolverWithWarmStart(block_size=2)
+    with caplog.at_level(logging.INFO, logger="capytaine.matrices.linear_solvers"):
+        linear_solver.solve(A, b)
+        linear_solver.solve(A, b)  # The initial guess is already the solution
+    nb_iter = [int(r.getMessage().split()[4]) for r in caplog.records if r.getMessage().startswith("End of GMRES")]
+    assert len(nb_iter) == 2
+    assert nb_iter[0] > 0
+    assert nb_iter[1] == 0
+
+def test_gmres_with_warm_start_several_rhs(solved_full_problem):
+    A, x_ref, b = solved_full_problem
+    linear_solver = GMRESSolverWithWarmStart(block_size=2)
+    X = linear_solver.solve(A, np.stack([b, 2*b], axis=1))
+    assert np.allclose(X, np.stack([x_ref, 2*x_ref], axis=1), rtol=1e-10)
+
 #######################################################################
 #           2x2 block symmetric matrices (reflection mesh)            #
 #######################################################################
@@ -67,6 +109,11 @@ def test_gmres_2x2_block_symmetric_toeplitz_problem(solved_2x2_block_symmetric_t
     x = solve_gmres(A, b)
     assert np.allclose(x, x_ref, rtol=1e-10)
 
+def test_gmres_with_warm_start_2x2_block_symmetric_toeplitz_problem(solved_2x2_block_symmetric_toeplitz_problem):
+    A, x_ref, b = solved_2x2_block_symmetric_toeplitz_problem
+    x = GMRESSolverWithWarmStart(block_size=4).solve(A, b)
+    assert np.allclose(x, x_ref, rtol=1e-10)
+
 #######################################################################
 #       Nested 2x2 block symmetric matrices (two reflections)         #
 #######################################################################
@@ -99,6 +146,14 @@ def test_gmres_2x2_nested_block_symmetric_toeplitz_problem(solved_nested_2x2_blo
     x = solve_gmres(A, b)
     assert np.allclose(x, x_ref, rtol=1e-10)
 
+def test_gmres_with_warm_start_nested_2x2_block_symmetric_toeplitz_problem(solved_nested_2x2_block_symmetric_toeplitz_problem, monkeypatch):
+    A, x_ref, b = solved_nested_2x2_block_symmetric_toeplitz_problem
+    def full_matrix_should_not_be_built(*args, **kwargs):
+        raise AssertionError("The full matrix should not be built")
+    monkeypatch.setattr(BlockMatrix, "full_matrix", full_matrix_should_not_be_built)
+    x = GMRESSolverWithWarmStart(block_size=3).solve(A, b)
+    assert np.allclose(x, x_ref, rtol=1e-10)
+
 #######################################################################
 #                           Block circulant                           #
 #######################################################################
@@ -170,3 +225,9 @@ def test_gmres_nested_block_problem(solved_nested_block_problem):
     A, x_ref, b = solved_nested_block_problem
     x = solve_gmres(A, b)
     assert np.allclose(x, x_ref, rtol=1e-10)
+
+def test_solve_with_lu_several_rhs(solved_2x2_block_symmetric_toeplitz_problem):
+    A, x_ref, b = solved_2x2_block_symmetric_toeplitz_problem
+    linear_solver = LUSolverWithCache()
+    X = linear_solver.solve(A, np.stack([b, 2*b, 3*b], axis=1))
+    assert np.allclose(X, np.stack([x_ref, 2*x_ref, 3*x_ref], axis=1), rtol=1e-10)
@@ -1,7 +1,20 @@
 import pytest
 import numpy as np
+from numpy.random import default_rng
 from capytaine.tools.symbolic_multiplication import SymbolicMultiplication, supporting_symbolic_multiplication
 
+@pytest.fixture
+def rng():
+    return default_rng(seed=0)
+
+@pytest.fixture
+def vector(rng):
+    return rng.random(10)
+
+@pytest.fixture
+def matrix(rng):
+    return rng.random((10, 10))
+
 def test_definition():
     zero = SymbolicMultiplication("0")
     assert zero.symbol == "0"
@@ -32,36 +45,55 @@ def test_float():
     b = 4.5 * zero
     assert float(b) == pytest.approx(0.0)
 
-def test_numpy_array():
+def test_numpy_array(vector):
     zero = SymbolicMultiplication("0")
-    b = np.random.rand(10) * zero
+    b = vector * zero
     assert (b / zero).shape == (10,)
+    assert np.allclose(b / zero, vector)
 
 def test_numpy_array_sum():
     zero = SymbolicMultiplication("0")
     b = np.ones(10) * zero
     assert (np.sum(b) / zero) == 10
 
-def test_numpy_matmul():
+def test_numpy_matmul(matrix, vector):
     zero = SymbolicMultiplication("0")
-    b = np.random.rand(10) * zero
-    A = np.random.rand(10, 10)
-    c = A @ b
+    b = vector * zero
+    c = matrix @ b
     assert (c/zero).shape == (10,)
+    assert np.allclose(c/zero, matrix @ vector)
 
 def test_undefined_case():
     assert np.isnan(float(SymbolicMultiplication("0", np.inf)))
     assert np.isnan(float(SymbolicMultiplication("∞", 0.0)))
 
-def test_supporting_symbolic_multiplication():
+def test_supporting_symbolic_multiplication(matrix, vector):
     zero = SymbolicMultiplication("0")
 
     @supporting_symbolic_multiplication
     def my_linear_operator(A, x):
         return np.linalg.solve(A, x)
 
-    b = np.random.rand(10) * zero
-    A = np.random.rand(10, 10)
-    c = my_linear_operator(A, b)
+    b = vector * zero
+    c = my_linear_operator(matrix, b)
     assert (c/zero).shape == (10,)
+    assert np.allclose(matrix @ (c/zero), vector)
+
+
+def test_supporting_symbolic_multiplication_passes_arrays_without_copy(matrix, vector):
+    # The overhead of the decorator should not depend on the size of the data.
+    zero = SymbolicMultiplication("0")
+    received = []
+
+    @supporting_symbolic_multiplication
+    def my_linear_operator(A, x):
+        received.append(x)
+        return A @ x
 
+    b = vector * zero
+    for _ in range(3):
+        my_linear_operator(matrix, b)
+    my_linear_operator(matrix, vector)
+    assert len(received) == 4
+    assert all(x is b.value for x in received[:3])
+    assert received[3] is vector